@@ -7,9 +7,10 @@ stock market data from the SQLite database populated by the ETL pipeline.
 import os
 from fastapi import FastAPI, HTTPException
 from sqlalchemy import create_engine, text
-from typing import List
-from .models import StockData, MarketOverview
+from typing import List, Optional
+from .models import StockData, MarketOverview, BatchQuery, BatchRequest, BatchResult, BatchResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # Import the Pydantic models we just created
 from .models import StockData
@@ -37,6 +38,10 @@ app.add_middleware(
     allow_headers=["*"],         # Allow all headers
 )
 
+# --- ADD GZIP MIDDLEWARE ---
+# Compress larger responses (stock histories, batches); tiny payloads aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # --- 2. DATABASE CONNECTION ---
 # Build an absolute path to the database file
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -50,19 +55,12 @@ if not os.path.exists(DB_PATH):
     
 engine = create_engine(DB_URI, connect_args={"check_same_thread": False})
 
-# --- 3. API ENDPOINTS --- ... ---
-
-@app.get("/")
-def read_root():
-    """A simple endpoint to confirm the API is online."""
-    return {"status": "ok", "message": "Welcome to the Financial Analytics API!"}
-
+# --- 3. QUERY HELPERS ---
+# Each helper runs its query on a connection supplied by the caller, so the
+# single-resource endpoints and the batch endpoint share exactly the same SQL.
 
-@app.get("/api/all-stocks", response_model=List[StockData])
-def get_all_stocks():
-    """
-    Retrieves the most recent data point for every stock in the database.
-    """
+def query_all_stocks(connection) -> List[dict]:
+    """Returns the most recent row for every stock symbol."""
     # This SQL query finds the latest date for each symbol and joins it back
     # to get the full row of data for that latest date.
     # This SQL query uses a window function, which is much more efficient.
@@ -78,17 +76,135 @@ def get_all_stocks():
     FROM ranked_stocks
     WHERE rn = 1;
     """
-    
-    try:
-        with engine.connect() as connection:
-            result = connection.execute(text(query))
-            rows = result.mappings().all() # .mappings() allows dict-like access
+    result = connection.execute(text(query))
+    rows = result.mappings().all() # .mappings() allows dict-like access
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="No stock data found in the database.")
+
+    return [dict(row) for row in rows]
+
+
+def query_stock_history(connection, symbol: str) -> List[dict]:
+    """Returns every row for a single stock symbol, oldest first."""
+    # Using a parameterized query to prevent SQL injection
+    query = text("SELECT * FROM stock_data WHERE symbol = :symbol ORDER BY date ASC")
+    result = connection.execute(query, {"symbol": symbol.upper()})
+    rows = result.mappings().all()
+
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No data found for symbol '{symbol}'.")
+
+    return [dict(row) for row in rows]
+
+
+def query_market_overview(connection) -> dict:
+    """Calculates the market KPIs for the most recent day of data."""
+    # Query to find the absolute latest date available in the database
+    latest_date_query = "SELECT MAX(date) FROM stock_data"
+    latest_date = connection.execute(text(latest_date_query)).scalar_one_or_none()
+
+    if not latest_date:
+        raise HTTPException(status_code=404, detail="No data available to calculate overview.")
+
+    # Query to get all data for that latest date and calculate KPIs
+    overview_query = text("""
+        WITH latest_day_data AS (
+            SELECT
+                *,
+                ((close - open) / open) AS pct_change
+            FROM stock_data
+            WHERE date = :latest_date
+        )
+        SELECT
+            (SELECT SUM(volume) FROM latest_day_data) AS total_volume,
+            (SELECT symbol FROM latest_day_data ORDER BY pct_change DESC LIMIT 1) AS top_gainer_symbol,
+            (SELECT MAX(pct_change) FROM latest_day_data) AS top_gainer_change,
+            (SELECT symbol FROM latest_day_data ORDER BY pct_change ASC LIMIT 1) AS top_loser_symbol,
+            (SELECT MIN(pct_change) FROM latest_day_data) AS top_loser_change;
+    """)
+    result = connection.execute(overview_query, {"latest_date": latest_date})
+    return dict(result.mappings().one()) # .one() gets a single result
+
+
+# Upper bound on sub-queries per /api/batch call, so one request can't tie up a connection indefinitely
+MAX_BATCH_QUERIES = 10
+
+
+def run_batch_query(connection, sub_query: BatchQuery):
+    """Dispatches a single batch sub-query to the matching query helper."""
+    if sub_query.query == "all-stocks":
+        return query_all_stocks(connection)
+    if sub_query.query == "market-overview":
+        return query_market_overview(connection)
+    if not sub_query.symbol:
+        raise HTTPException(status_code=422, detail="'stock-history' requires a 'symbol'.")
+    return query_stock_history(connection, sub_query.symbol)
+
+
+def run_batch(queries: List[BatchQuery]) -> dict:
+    """
+    Runs a list of sub-queries over one connection and one read snapshot.
+
+    A failing sub-query is reported in its own result instead of failing the
+    whole batch, so one unknown symbol doesn't blank the entire dashboard.
+    Identical sub-queries under different names are only executed once.
+    """
+    results = {}
+    executed = {}
+    with engine.connect() as connection:
+        # pysqlite only opens a transaction before writes, so we begin one
+        # explicitly to make every SELECT below read the same snapshot. The
+        # pipeline creates the database in WAL mode, so its commits during the
+        # batch simply aren't visible here. Under the default rollback journal
+        # this transaction's SHARED lock would instead block the pipeline's
+        # writes until the batch finishes (failing them after the 5 s timeout).
+        connection.exec_driver_sql("BEGIN")
+        try:
+            for sub_query in queries:
+                key = (sub_query.query, (sub_query.symbol or "").upper())
+                if key not in executed:
+                    try:
+                        executed[key] = BatchResult(data=run_batch_query(connection, sub_query))
+                    except HTTPException as e:
+                        executed[key] = BatchResult(status_code=e.status_code, error=str(e.detail))
+                    except Exception as e:
+                        executed[key] = BatchResult(status_code=500, error=f"An error occurred: {e}")
+                results[sub_query.name] = executed[key]
+        finally:
+            connection.rollback()
+
+    return {"results": results}
 
-        if not rows:
-            raise HTTPException(status_code=404, detail="No stock data found in the database.")
 
-        # Pydantic will automatically validate that the database rows match our StockData model
-        return rows
+def dashboard_preset(symbol: Optional[str] = None) -> List[BatchQuery]:
+    """The sub-queries the React dashboard needs for its first render."""
+    queries = [
+        BatchQuery(name="allStocks", query="all-stocks"),
+        BatchQuery(name="marketOverview", query="market-overview"),
+    ]
+    if symbol:
+        queries.append(BatchQuery(name="stockHistory", query="stock-history", symbol=symbol))
+    return queries
+
+
+# --- 4. API ENDPOINTS ---
+
+@app.get("/")
+def read_root():
+    """A simple endpoint to confirm the API is online."""
+    return {"status": "ok", "message": "Welcome to the Financial Analytics API!"}
+
+
+@app.get("/api/all-stocks", response_model=List[StockData])
+def get_all_stocks():
+    """
+    Retrieves the most recent data point for every stock in the database.
+    """
+    try:
+        with engine.connect() as connection:
+            # Pydantic will automatically validate that the database rows match our StockData model
+            return query_all_stocks(connection)
     except Exception as e:
         # A general catch-all for any other database errors
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
@@ -101,18 +217,9 @@ def get_stock_history(symbol: str):
     Retrieves the full historical data for a given stock symbol.
     The symbol is passed as a path parameter.
     """
-    # Using a parameterized query to prevent SQL injection
-    query = text("SELECT * FROM stock_data WHERE symbol = :symbol ORDER BY date ASC")
-    
     try:
         with engine.connect() as connection:
-            result = connection.execute(query, {"symbol": symbol.upper()})
-            rows = result.mappings().all()
-
-        if not rows:
-            raise HTTPException(status_code=404, detail=f"No data found for symbol '{symbol}'.")
-
-        return rows
+            return query_stock_history(connection, symbol)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
@@ -123,39 +230,43 @@ def get_market_overview():
     Retrieves high-level market KPIs for the most recent day of data.
     Calculates total volume, and identifies the top gainer and loser.
     """
-    # Query to find the absolute latest date available in the database
-    latest_date_query = "SELECT MAX(date) FROM stock_data"
-    
     try:
         with engine.connect() as connection:
-            latest_date_result = connection.execute(text(latest_date_query))
-            latest_date = latest_date_result.scalar_one_or_none()
-
-        if not latest_date:
-            raise HTTPException(status_code=404, detail="No data available to calculate overview.")
-
-        # Query to get all data for that latest date and calculate KPIs
-        overview_query = text("""
-            WITH latest_day_data AS (
-                SELECT
-                    *,
-                    ((close - open) / open) AS pct_change
-                FROM stock_data
-                WHERE date = :latest_date
-            )
-            SELECT
-                (SELECT SUM(volume) FROM latest_day_data) AS total_volume,
-                (SELECT symbol FROM latest_day_data ORDER BY pct_change DESC LIMIT 1) AS top_gainer_symbol,
-                (SELECT MAX(pct_change) FROM latest_day_data) AS top_gainer_change,
-                (SELECT symbol FROM latest_day_data ORDER BY pct_change ASC LIMIT 1) AS top_loser_symbol,
-                (SELECT MIN(pct_change) FROM latest_day_data) AS top_loser_change;
-        """)
+            return query_market_overview(connection)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
-        with engine.connect() as connection:
-            result = connection.execute(overview_query, {"latest_date": latest_date})
-            overview_data = result.mappings().one() # .one() gets a single result
 
-        return overview_data
+# Endpoint that runs several named sub-queries in a single round-trip
+@app.post("/api/batch", response_model=BatchResponse)
+def post_batch(batch: BatchRequest):
+    """
+    Runs a list of named sub-queries together and returns one combined response.
+
+    Each sub-query names one of the read endpoints above ('all-stocks',
+    'market-overview' or 'stock-history' with a 'symbol'). Results are keyed
+    by the sub-query's name and carry their own status code and error.
+    """
+    names = [sub_query.name for sub_query in batch.queries]
+    if len(names) != len(set(names)):
+        raise HTTPException(status_code=422, detail="Sub-query names must be unique.")
+    if len(names) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=422, detail=f"A batch may contain at most {MAX_BATCH_QUERIES} sub-queries.")
+
+    try:
+        return run_batch(batch.queries)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
+
+# Preset batch with everything the dashboard needs on first load
+@app.get("/api/batch/dashboard", response_model=BatchResponse)
+def get_dashboard_batch(symbol: Optional[str] = None):
+    """
+    Bootstraps the dashboard in one round-trip: the latest row for every stock,
+    the market overview and, if a symbol is given, that stock's history.
+    """
+    try:
+        return run_batch(dashboard_preset(symbol))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
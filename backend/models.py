@@ -8,7 +8,7 @@ documentation for our API.
 """
 from pydantic import BaseModel
 from datetime import date
-from typing import List
+from typing import Dict, List, Literal, Optional, Union
 
 class StockData(BaseModel):
     """Defines the structure for a single stock data point in the API response."""
@@ -30,4 +30,24 @@ class MarketOverview(BaseModel):
     top_gainer_symbol: str
     top_gainer_change: float
     top_loser_symbol: str
-    top_loser_change: float
\ No newline at end of file
+    top_loser_change: float
+
+class BatchQuery(BaseModel):
+    """Defines a single named sub-query within a batch request."""
+    name: str
+    query: Literal["all-stocks", "market-overview", "stock-history"]
+    symbol: Optional[str] = None # Only used by 'stock-history'
+
+class BatchRequest(BaseModel):
+    """Defines the request body for the batch endpoint."""
+    queries: List[BatchQuery]
+
+class BatchResult(BaseModel):
+    """Defines the outcome of one sub-query: either its data or its error."""
+    status_code: int = 200
+    data: Optional[Union[List[StockData], MarketOverview]] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    """Defines the combined batch response, keyed by sub-query name."""
+    results: Dict[str, BatchResult]
@@ -0,0 +1,118 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import backend.main
+from backend.main import MAX_BATCH_QUERIES, app
+
+
+def make_client(tmp_path, monkeypatch) -> TestClient:
+    """Points the API at a temporary database holding two days of IBM and AAPL."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        connection.execute(text("""
+            CREATE TABLE stock_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL, date TEXT NOT NULL,
+                open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL,
+                close REAL NOT NULL, volume INTEGER NOT NULL,
+                UNIQUE(symbol, date)
+            )
+        """))
+        connection.execute(
+            text("INSERT INTO stock_data (symbol, date, open, high, low, close, volume) "
+                 "VALUES (:symbol, :date, :open, :high, :low, :close, :volume)"),
+            [
+                {"symbol": "IBM", "date": "2024-01-01", "open": 100.0, "high": 102.0, "low": 99.0, "close": 101.0, "volume": 1000},
+                {"symbol": "IBM", "date": "2024-01-02", "open": 101.0, "high": 104.0, "low": 100.0, "close": 103.0, "volume": 1200},
+                {"symbol": "AAPL", "date": "2024-01-01", "open": 50.0, "high": 51.0, "low": 48.0, "close": 49.0, "volume": 3000},
+                {"symbol": "AAPL", "date": "2024-01-02", "open": 49.0, "high": 50.0, "low": 47.0, "close": 48.0, "volume": 3200},
+            ],
+        )
+    monkeypatch.setattr(backend.main, "engine", engine)
+    return TestClient(app)
+
+
+def test_batch_returns_each_result_by_name(tmp_path, monkeypatch):
+    """
+    Tests that a batch returns every sub-query's data under its own name.
+    """
+    client = make_client(tmp_path, monkeypatch)
+    response = client.post("/api/batch", json={"queries": [
+        {"name": "stocks", "query": "all-stocks"},
+        {"name": "overview", "query": "market-overview"},
+        {"name": "history", "query": "stock-history", "symbol": "IBM"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results["stocks"]["data"]) == 2
+    assert results["overview"]["data"]["top_gainer_symbol"] == "IBM"
+    assert [row["date"] for row in results["history"]["data"]] == ["2024-01-01", "2024-01-02"]
+
+
+def test_failing_sub_queries_report_their_own_errors(tmp_path, monkeypatch):
+    """
+    Tests that a failing sub-query gets its own 404/422 inside a 200 response.
+    """
+    client = make_client(tmp_path, monkeypatch)
+    response = client.post("/api/batch", json={"queries": [
+        {"name": "stocks", "query": "all-stocks"},
+        {"name": "unknown", "query": "stock-history", "symbol": "ZZZ"},
+        {"name": "no_symbol", "query": "stock-history"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results["stocks"]["status_code"] == 200
+    assert results["unknown"]["status_code"] == 404
+    assert results["unknown"]["data"] is None
+    assert results["no_symbol"]["status_code"] == 422
+
+
+def test_identical_sub_queries_run_once(tmp_path, monkeypatch):
+    """
+    Tests that sub-queries differing only in symbol case are executed once.
+    """
+    client = make_client(tmp_path, monkeypatch)
+    calls = []
+    query_stock_history = backend.main.query_stock_history
+
+    def counting_query_stock_history(connection, symbol):
+        calls.append(symbol)
+        return query_stock_history(connection, symbol)
+
+    monkeypatch.setattr(backend.main, "query_stock_history", counting_query_stock_history)
+    response = client.post("/api/batch", json={"queries": [
+        {"name": "upper", "query": "stock-history", "symbol": "IBM"},
+        {"name": "lower", "query": "stock-history", "symbol": "ibm"},
+    ]})
+
+    results = response.json()["results"]
+    assert len(calls) == 1
+    assert results["upper"] == results["lower"]
+
+
+def test_invalid_batches_are_rejected(tmp_path, monkeypatch):
+    """
+    Tests that duplicate names and oversized batches are rejected with 422.
+    """
+    client = make_client(tmp_path, monkeypatch)
+    duplicate_names = [{"name": "stocks", "query": "all-stocks"}] * 2
+    too_many = [{"name": f"q{i}", "query": "all-stocks"} for i in range(MAX_BATCH_QUERIES + 1)]
+
+    assert client.post("/api/batch", json={"queries": duplicate_names}).status_code == 422
+    assert client.post("/api/batch", json={"queries": too_many}).status_code == 422
+
+
+def test_dashboard_preset_adds_history_only_for_a_symbol(tmp_path, monkeypatch):
+    """
+    Tests that the dashboard preset includes 'stockHistory' only when a symbol is given.
+    """
+    client = make_client(tmp_path, monkeypatch)
+
+    results = client.get("/api/batch/dashboard").json()["results"]
+    assert set(results) == {"allStocks", "marketOverview"}
+
+    results = client.get("/api/batch/dashboard", params={"symbol": "aapl"}).json()["results"]
+    assert set(results) == {"allStocks", "marketOverview", "stockHistory"}
+    assert results["stockHistory"]["data"][0]["symbol"] == "AAPL"
@@ -3,7 +3,7 @@ import './App.css';
 import { StockDataTable } from './components/StockDataTable';
 import { HistoricalChart } from './components/HistoricalChart';
 import { KpiCard } from './components/KpiCards';
-import { fetchAllStocks, fetchStockHistory, fetchMarketOverview, StockData, MarketOverview } from './services/apiService';
+import { fetchDashboard, fetchStockHistory, StockData, MarketOverview } from './services/apiService';
 
 function App() {
   const [allStocks, setAllStocks] = useState<StockData[]>([]);
@@ -15,10 +15,7 @@ function App() {
   useEffect(() => {
     (async () => {
       setIsLoading(true); // <-- 2. Set loading to true before fetching
-      const [stocksData, overviewData] = await Promise.all([
-        fetchAllStocks(),
-        fetchMarketOverview()
-      ]);
+      const { allStocks: stocksData, marketOverview: overviewData } = await fetchDashboard();
       setAllStocks(stocksData);
       setMarketOverview(overviewData);
       setIsLoading(false); // <-- 3. Set loading to false after fetching
@@ -54,4 +54,24 @@ export const fetchMarketOverview = async (): Promise<MarketOverview | null> => {
     console.error("Error fetching market overview:", error);
     return null;
   }
-};
\ No newline at end of file
+};
+
+export interface DashboardData {
+  allStocks: StockData[];
+  marketOverview: MarketOverview | null;
+}
+
+// Loads everything the dashboard needs for its first render in one round-trip.
+export const fetchDashboard = async (): Promise<DashboardData> => {
+  try {
+    const response = await apiClient.get('/api/batch/dashboard');
+    const { allStocks, marketOverview } = response.data.results;
+    return {
+      allStocks: allStocks.data ?? [],
+      marketOverview: marketOverview.data ?? null,
+    };
+  } catch (error) {
+    console.error("Error fetching dashboard data:", error);
+    return { allStocks: [], marketOverview: null };
+  }
+};
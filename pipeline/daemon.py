@@ -0,0 +1,164 @@
+"""
+Long-running Pipeline Daemon.
+
+This module keeps the ETL pipeline running as a single long-lived process
+instead of a cold daily batch job. The interpreter, heavy imports, the
+database engine and the HTTP connection pool are created once and reused
+for every refresh. Symbols are refreshed one at a time by the priority
+scheduler, which spreads the calls across the API quota window and
+re-queues each symbol after the next market close.
+
+A small control API is served on localhost while the daemon runs:
+    GET  /status            queue depth, running job, next-run times
+    POST /refresh/{symbol}  move a symbol to the front of the queue
+
+Run it from the project root with:  python -m pipeline.main --daemon
+"""
+import asyncio
+import contextlib
+import os
+from datetime import date, datetime, timezone
+from typing import List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+from .main import run_pipeline, STOCKS_TO_TRACK
+from .loader import create_stock_data_table, get_latest_dates, get_recent_records
+from .reporter import generate_pdf_report, get_report_path
+from .scheduler import RefreshScheduler, last_session_date
+
+CONTROL_HOST = "127.0.0.1" # Local only; the control API has no authentication
+CONTROL_PORT = int(os.getenv("PIPELINE_CONTROL_PORT", "8765"))
+# Days of history per symbol in the daily report: Alpha Vantage's compact
+# output, which is what the batch run reports on
+REPORT_HISTORY_DAYS = 100
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PipelineDaemon:
+    """Runs scheduled symbol refreshes over a shared HTTP client."""
+
+    def __init__(self, client: httpx.AsyncClient, symbols: List[str]):
+        self.client = client
+        self.symbols = symbols
+        self.scheduler = RefreshScheduler(symbols)
+        self._wakeup = asyncio.Event()
+        self._reported_session = None
+
+    def request_refresh(self, symbol: str):
+        """Queues a symbol for immediate refresh (raises KeyError if untracked)."""
+        self.scheduler.request_refresh(symbol, _now())
+        self._wakeup.set()
+
+    async def start(self):
+        """Schedules every symbol from the database and catches up on a missed report."""
+        self.scheduler.seed(get_latest_dates(), _now())
+        # An earlier run may have loaded the whole session and stopped before reporting
+        await self._maybe_generate_report()
+
+    async def run_forever(self):
+        """Hands due symbols to the pipeline one at a time, sleeping in between."""
+        await self.start()
+        while True:
+            symbol = self.scheduler.pop_due(_now())
+            if symbol is None:
+                await self._sleep_until(self.scheduler.next_wakeup(_now()))
+                continue
+            await self._refresh(symbol)
+
+    async def _sleep_until(self, wake_at):
+        # A manual refresh request sets the event and wakes us early
+        timeout = None if wake_at is None else (wake_at - _now()).total_seconds()
+        self._wakeup.clear()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    async def _refresh(self, symbol: str):
+        records, error = [], None
+        try:
+            records = await run_pipeline(
+                symbols=[symbol], client=self.client, request_delay=0, generate_report=False
+            )
+            if not records:
+                error = "No data fetched or transformed."
+        except Exception as e:
+            error = f"An error occurred: {e}"
+            print(f"Refresh failed for {symbol}: {e}")
+
+        latest_date = max((date.fromisoformat(record['date']) for record in records), default=None)
+        self.scheduler.record_result(symbol, latest_date, _now(), error)
+        await self._maybe_generate_report()
+
+    async def _maybe_generate_report(self):
+        """Generates the daily PDF once every symbol has the latest session loaded."""
+        session = last_session_date(_now())
+        if session == self._reported_session or not self.scheduler.session_complete(session):
+            return
+
+        # Check the report file rather than what this process loaded, since
+        # part of the session may have been loaded by a run that has since stopped
+        if not os.path.exists(get_report_path(session.isoformat())):
+            try:
+                # Reading the history and rendering the PDF are blocking, so keep them off the event loop
+                await asyncio.to_thread(self._generate_report)
+            except Exception as e:
+                # Leave the session unreported so the next refresh or restart tries again
+                print(f"Error generating report for {session}: {e}")
+                return
+        self._reported_session = session
+
+    def _generate_report(self):
+        generate_pdf_report(get_recent_records(self.symbols, REPORT_HISTORY_DAYS))
+
+
+def create_control_app(daemon: PipelineDaemon) -> FastAPI:
+    """Builds the local control API for a running daemon."""
+    control_app = FastAPI(title="Pipeline Daemon Control", version="1.0.0")
+
+    # Handlers are async so they run on the daemon's event loop, not a worker thread
+    @control_app.get("/status")
+    async def get_status():
+        """Returns the queue depth, running job and next-run time of every symbol."""
+        return daemon.scheduler.status(_now())
+
+    @control_app.post("/refresh/{symbol}")
+    async def post_refresh(symbol: str):
+        """Moves a tracked symbol to the front of the refresh queue."""
+        try:
+            daemon.request_refresh(symbol.upper())
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Symbol '{symbol}' is not tracked.")
+        return {"status": "queued", "symbol": symbol.upper()}
+
+    return control_app
+
+
+async def run_daemon(symbols: List[str] = STOCKS_TO_TRACK, port: int = CONTROL_PORT):
+    """Runs the scheduler and the control API until interrupted."""
+    print("--- Starting ETL Pipeline Daemon ---")
+    create_stock_data_table()
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        daemon = PipelineDaemon(client, symbols)
+        server = uvicorn.Server(uvicorn.Config(
+            create_control_app(daemon), host=CONTROL_HOST, port=port, log_level="warning"
+        ))
+
+        scheduler_task = asyncio.create_task(daemon.run_forever())
+        # If the scheduler dies, stop the control API too instead of serving a dead queue
+        scheduler_task.add_done_callback(lambda task: setattr(server, "should_exit", True))
+
+        print(f"Control API listening on http://{CONTROL_HOST}:{port}/status")
+        try:
+            await server.serve()
+        finally:
+            scheduler_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await scheduler_task
+
+    print("\n--- ETL Pipeline Daemon Stopped ---")
@@ -8,8 +8,9 @@ approach to data persistence.
 """
 import os
 import pandas as pd
-from typing import List
-from sqlalchemy import create_engine, text
+from datetime import date
+from typing import Dict, List
+from sqlalchemy import bindparam, create_engine, insert, text
 
 # Define the path for the database relative to the project root
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'market_data.db')
@@ -40,22 +41,37 @@ def create_stock_data_table():
     """
     try:
         with engine.connect() as connection:
+            # WAL lets the API keep reading a snapshot while the pipeline writes;
+            # with the default rollback journal a reader's lock blocks our commits.
+            # The mode is stored in the database file, so it only needs setting once.
+            connection.execute(text("PRAGMA journal_mode=WAL"))
             connection.execute(text(create_table_sql))
         print("Table 'stock_data' is ready.")
     except Exception as e:
         print(f"Error creating table: {e}")
 
 
-def load_data_to_db(clean_records: List[dict]):
+def _insert_or_ignore(pd_table, connection, keys, data_iter):
+    """A pandas 'to_sql' insertion method that skips rows already in the table."""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    statement = insert(pd_table.table).prefix_with("OR IGNORE")
+    result = connection.execute(statement, rows)
+    return result.rowcount
+
+
+def load_data_to_db(clean_records: List[dict]) -> int:
     """
     Loads a list of clean records into the SQLite database.
     
-    Uses pandas to facilitate the loading process and handles potential
-    integrity errors (like duplicate entries) gracefully.
+    Uses pandas to facilitate the loading process. Rows for a (symbol, date)
+    that is already stored are skipped, so overlapping fetches only add the
+    new days instead of failing the whole insert on the first duplicate.
+    Returns the number of new rows. Write errors (e.g. 'database is locked')
+    are re-raised so callers don't treat unsaved data as loaded.
     """
     if not clean_records:
         print("No records to load.")
-        return
+        return 0
 
     df = pd.DataFrame(clean_records)
     
@@ -66,18 +82,51 @@ def load_data_to_db(clean_records: List[dict]):
         # 'to_sql' is a powerful pandas function to write to a SQL database
         # 'if_exists='append'' adds new data
         # 'index=False' prevents pandas from writing its own index column
-        # 'method='multi'' can be more efficient for inserting many rows
-        df.to_sql(
+        # 'method=_insert_or_ignore' skips duplicates instead of raising IntegrityError
+        inserted = df.to_sql(
             'stock_data', 
             con=engine, 
             if_exists='append', 
             index=False, 
-            method='multi'
+            method=_insert_or_ignore
         )
-        print(f"Successfully loaded {len(df)} records into the database.")
+        print(f"Successfully loaded {inserted} new records into the database ({len(df) - inserted} already present).")
+        return inserted
     except Exception as e:
-        # This will often catch IntegrityErrors if we try to insert duplicates
         print(f"Error loading data to database: {e}")
+        raise
+
+
+def get_latest_dates() -> Dict[str, date]:
+    """Returns the most recent stored trading day for every symbol."""
+    query = text("SELECT symbol, MAX(date) AS latest_date FROM stock_data GROUP BY symbol")
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(query).all()
+    except Exception as e:
+        print(f"Error reading latest dates from database: {e}")
+        return {}
+    return {symbol: date.fromisoformat(latest_date) for symbol, latest_date in rows}
+
+
+def get_recent_records(symbols: List[str], days: int) -> List[dict]:
+    """Returns the most recent 'days' records for each of the given symbols."""
+    query = text("""
+    WITH ranked_stocks AS (
+        SELECT
+            *,
+            ROW_NUMBER() OVER(PARTITION BY symbol ORDER BY date DESC) as rn
+        FROM stock_data
+        WHERE symbol IN :symbols
+    )
+    SELECT symbol, date, open, high, low, close, volume
+    FROM ranked_stocks
+    WHERE rn <= :days
+    ORDER BY symbol, date;
+    """).bindparams(bindparam("symbols", expanding=True))
+    with engine.connect() as connection:
+        rows = connection.execute(query, {"symbols": list(symbols), "days": days}).mappings().all()
+    return [dict(row) for row in rows]
 
 
 # Example of how to run this script directly for testing
@@ -0,0 +1,77 @@
+"""
+Single-instance Lock for the Pipeline.
+
+This module makes sure only one pipeline process, either a batch run or
+the daemon, writes to the database at a time. It is kept separate from
+the daemon so a batch run can take the lock without importing the
+daemon's web server dependencies.
+
+The lock is an OS advisory lock on a file rather than the file's mere
+existence. The operating system releases it when its owner exits or
+crashes, so there is never a stale lock to detect and take over, and no
+window in which two processes can both decide they own it.
+"""
+import contextlib
+import os
+
+from .loader import DB_PATH
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+LOCK_PATH = os.path.join(os.path.dirname(DB_PATH), 'pipeline.lock')
+
+
+def _try_lock(lock_file) -> bool:
+    """Takes an exclusive, non-blocking lock on an open file; False if it's held."""
+    try:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(lock_file):
+    if os.name == "nt":
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def single_instance_lock(path: str = LOCK_PATH):
+    """
+    Ensures only one pipeline process (batch run or daemon) writes at a time.
+
+    The lock file holds the owner's PID for diagnostics only. It is left in
+    place on exit: deleting it could let a waiting process lock a file that
+    no longer exists while a third one creates a new one.
+    """
+    # 'a+' opens without truncating, so a refused process can't wipe the owner's PID
+    lock_file = open(path, "a+")
+    try:
+        if not _try_lock(lock_file):
+            try:
+                lock_file.seek(0)
+                owner = lock_file.read().strip()
+            except OSError:
+                owner = "" # Windows refuses reads of the locked region
+            raise SystemExit(f"Another pipeline process ({owner or 'unknown'}) holds {path}. Exiting.")
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+    finally:
+        lock_file.close()
@@ -6,42 +6,31 @@ It orchestrates the process of fetching, transforming, loading and
 reporting on stock market data by calling the respective modules in sequence.
 
 This script is intended to be run automatically on a schedule (e.g., via GitHub Actions).
+Pass '--daemon' to keep it running instead and refresh each stock shortly
+after the market closes (see pipeline/daemon.py).
 """
+import argparse
 import asyncio
+import sys
 import httpx
+from typing import List, Optional
 
 # Import the functions from our other pipeline modules
 from .api_client import fetch_stock_data
 from .transformer import transform_raw_data
 from .loader import create_stock_data_table, load_data_to_db
 from .reporter import generate_pdf_report
+from .lock import single_instance_lock
 
 # Define the list of stocks we want to track
 STOCKS_TO_TRACK = ["IBM", "AAPL", "GOOG", "MSFT", "NVDA"]
 
-async def run_pipeline():
+def transform_and_load(all_raw_data: List[tuple]) -> List[dict]:
     """
-    Executes the full ETL pipeline for all tracked stocks.
-    """
-    print("--- Starting ETL Pipeline ---")
-    
-    # --- EXTRACT ---
-    print(f"Fetching data for {len(STOCKS_TO_TRACK)} stocks...")
-    all_raw_data = []
-    async with httpx.AsyncClient() as client:
-        # We will fetch sequentially to respect the API limit, but async client is still good practice
-        for symbol in STOCKS_TO_TRACK:
-            await asyncio.sleep(15) # Add a 15-second delay to be very safe with the API limit
-            raw_data = await fetch_stock_data(client, symbol)
-            if raw_data and "Meta Data" in raw_data:
-                all_raw_data.append((symbol, raw_data))
-            elif raw_data:
-                print(f"API returned a note for {symbol}: {raw_data.get('Note', 'No data returned')}")
-
-    if not all_raw_data:
-        print("No data fetched. Exiting pipeline.")
-        return
+    Transforms the fetched raw data and loads it into the database.
 
+    Returns the clean records, or an empty list if nothing could be transformed.
+    """
     # --- TRANSFORM ---
     print("\nTransforming raw data...")
     all_clean_records = []
@@ -52,20 +41,81 @@ async def run_pipeline():
     
     if not all_clean_records:
         print("No data was successfully transformed. Exiting pipeline.")
-        return
+        return []
 
     # --- LOAD ---
     print("\nLoading data into database...")
     create_stock_data_table() # Ensure table exists
     load_data_to_db(all_clean_records)
+    return all_clean_records
+
+
+async def run_pipeline(
+    symbols: List[str] = STOCKS_TO_TRACK,
+    client: Optional[httpx.AsyncClient] = None,
+    request_delay: float = 15,
+    generate_report: bool = True,
+) -> List[dict]:
+    """
+    Executes the full ETL pipeline for the given stocks (all tracked stocks by default).
+
+    The daemon passes its own long-lived 'client' and paces requests itself,
+    so it refreshes one symbol at a time with no delay and no report.
+    Returns the clean records that were loaded; if they can't be written to
+    the database the error is raised instead.
+    """
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await run_pipeline(symbols, client, request_delay, generate_report)
+
+    print("--- Starting ETL Pipeline ---")
+    
+    # --- EXTRACT ---
+    print(f"Fetching data for {len(symbols)} stocks...")
+    all_raw_data = []
+    # We will fetch sequentially to respect the API limit, but async client is still good practice
+    for symbol in symbols:
+        await asyncio.sleep(request_delay) # 15 seconds by default, to be very safe with the API limit
+        raw_data = await fetch_stock_data(client, symbol)
+        if raw_data and "Meta Data" in raw_data:
+            all_raw_data.append((symbol, raw_data))
+        elif raw_data:
+            print(f"API returned a note for {symbol}: {raw_data.get('Note', 'No data returned')}")
+
+    if not all_raw_data:
+        print("No data fetched. Exiting pipeline.")
+        return []
+
+    # --- TRANSFORM & LOAD ---
+    # Pandas and SQLite calls are blocking, so run them in a worker thread;
+    # this keeps the daemon's control API responsive during the load
+    all_clean_records = await asyncio.to_thread(transform_and_load, all_raw_data)
+    if not all_clean_records:
+        return []
 
     # --- REPORT ---
-    print("\nGenerating daily PDF report...")
-    generate_pdf_report(all_clean_records)
+    if generate_report:
+        print("\nGenerating daily PDF report...")
+        generate_pdf_report(all_clean_records)
 
     print("\n--- ETL Pipeline Finished Successfully ---")
+    return all_clean_records
 
 
 if __name__ == '__main__':
-    # Use asyncio.run() to execute our async main function
-    asyncio.run(run_pipeline())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline once, or keep it running as a daemon.")
+    parser.add_argument("--daemon", action="store_true", help="Run as a long-lived scheduler with a local control API.")
+    args = parser.parse_args()
+
+    # The lock stops a batch run and a daemon (or two of either) writing at the same time
+    with single_instance_lock():
+        if args.daemon:
+            # Register this script as 'pipeline.main' so the daemon's import of it
+            # reuses this module instead of loading a second copy
+            sys.modules.setdefault("pipeline.main", sys.modules[__name__])
+            # Only the daemon needs the web server dependencies
+            from .daemon import run_daemon
+            asyncio.run(run_daemon())
+        else:
+            # Use asyncio.run() to execute our async main function
+            asyncio.run(run_pipeline())
\ No newline at end of file
@@ -13,7 +13,6 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML, CSS
 
 # Define paths relative to this script's location
 PIPELINE_DIR = os.path.dirname(__file__)
@@ -25,6 +24,10 @@ TEMPLATE_PATH = PIPELINE_DIR
 # Ensure the reports directory exists
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+def get_report_path(report_date: str) -> str:
+    """Returns where the PDF report for a given date (YYYY-MM-DD) is written."""
+    return os.path.join(REPORTS_DIR, f"daily_summary_{report_date}.pdf")
+
 def generate_pdf_report(clean_records: List[dict]):
     """
     Generates a polished PDF report from a list of clean stock data records.
@@ -33,6 +36,10 @@ def generate_pdf_report(clean_records: List[dict]):
         print("No data available to generate a report.")
         return
 
+    # WeasyPrint loads native GTK/pango libraries on import, so only pull it
+    # in when a PDF is actually rendered (not whenever the pipeline is imported)
+    from weasyprint import HTML, CSS
+
     df = pd.DataFrame(clean_records)
     df['date'] = pd.to_datetime(df['date'])
     
@@ -98,7 +105,6 @@ def generate_pdf_report(clean_records: List[dict]):
         th { background-color: #f0f0f0; font-weight: bold; }
         img { max-width: 90%; height: auto; border: 1px solid #ddd; padding: 5px; }
     ''')
-    report_filename = f"daily_summary_{latest_date}.pdf"
-    report_path = os.path.join(REPORTS_DIR, report_filename)
+    report_path = get_report_path(latest_date)
     HTML(string=html_out).write_pdf(report_path, stylesheets=[css])
     print(f"Polished PDF report generated: {report_path}")
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Refresh Scheduler for the Pipeline Daemon.
+
+This module decides *when* each tracked stock symbol should be refreshed.
+It keeps a priority queue of per-symbol jobs ordered by due time and
+staleness, paces API calls evenly across the Alpha Vantage quota window
+instead of bursting them, and schedules each symbol's next refresh shortly
+after the following market close.
+
+It deliberately performs no I/O, so the scheduling rules can be unit tested
+on their own; the daemon module wires it up to the API client and database.
+"""
+import heapq
+import itertools
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# US equity markets close at 16:00 New York time on weekdays.
+# Exchange holidays are not modelled; a refresh on a holiday simply finds no
+# new session and is retried with backoff.
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+# Alpha Vantage publishes the daily bar a little after the closing bell
+SETTLE_DELAY = timedelta(minutes=30)
+
+# The free Alpha Vantage tier allows 25 requests per day
+QUOTA_WINDOW = timedelta(days=1)
+DAILY_REQUEST_QUOTA = int(os.getenv("ALPHA_VANTAGE_DAILY_QUOTA", "25"))
+# Never call the API more often than this, whatever the quota allows (same margin as the batch run)
+MIN_REQUEST_SPACING = timedelta(seconds=15)
+
+# Backoff for symbols whose refresh failed or didn't contain the expected session yet
+RETRY_DELAY = timedelta(minutes=30)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+# Priority given to manually requested refreshes (lower runs first)
+MANUAL_PRIORITY = -1_000_000
+
+
+def _session_ready_at(day: date) -> datetime:
+    """Returns the moment a trading day's data is expected to be published."""
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ) + SETTLE_DELAY
+
+
+def last_session_date(now: datetime) -> date:
+    """Returns the most recent trading day whose data should already be available."""
+    day = now.astimezone(MARKET_TZ).date()
+    while day.weekday() >= 5 or _session_ready_at(day) > now:
+        day -= timedelta(days=1)
+    return day
+
+
+def next_session_ready_at(now: datetime) -> datetime:
+    """Returns when the next trading day's data becomes available after 'now'."""
+    day = now.astimezone(MARKET_TZ).date()
+    while day.weekday() >= 5 or _session_ready_at(day) <= now:
+        day += timedelta(days=1)
+    return _session_ready_at(day)
+
+
+@dataclass
+class SymbolJob:
+    """The refresh state of a single tracked symbol."""
+    symbol: str
+    latest_date: Optional[date] = None # Most recent trading day stored for this symbol
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    failures: int = 0
+    version: int = 0 # Identifies the job's live queue entry; older entries are skipped
+
+
+class RefreshScheduler:
+    """
+    A priority queue of symbol refresh jobs with even request pacing.
+
+    Jobs are queued by due time. Among the jobs that are due, manual
+    requests run first and then the symbols that are furthest behind, so
+    when several symbols become due at the same market close the most
+    stale one is refreshed first. Consecutive API calls are spaced by
+    'quota_window / quota', which spreads the refreshes out and can never
+    exceed the quota. Only one job is handed out at a time; the next one is
+    available once the running job has been recorded, so refreshes never
+    overlap.
+    """
+
+    def __init__(self, symbols: List[str], quota: int = DAILY_REQUEST_QUOTA, quota_window: timedelta = QUOTA_WINDOW):
+        self.jobs: Dict[str, SymbolJob] = {symbol: SymbolJob(symbol) for symbol in symbols}
+        self.quota = quota
+        self.quota_window = quota_window
+        self.request_spacing = max(MIN_REQUEST_SPACING, quota_window / quota)
+        self.running: Optional[str] = None
+        self.next_request_at: Optional[datetime] = None
+        self._queue = []
+        self._versions = itertools.count(1)
+        self._request_log = deque()
+
+    def seed(self, latest_dates: Dict[str, date], now: datetime):
+        """Schedules every job from the latest dates already stored in the database."""
+        for job in self.jobs.values():
+            job.latest_date = latest_dates.get(job.symbol)
+            if self._is_stale(job, now):
+                self._schedule(job, now, self._staleness_priority(job, now))
+            else:
+                self._schedule(job, next_session_ready_at(now), 0)
+
+    def request_refresh(self, symbol: str, now: datetime):
+        """
+        Moves a symbol to the front of the queue.
+
+        Raises KeyError for symbols that aren't tracked. If the symbol is
+        currently running, its completed refresh satisfies the request.
+        """
+        job = self.jobs[symbol]
+        if self.running != symbol:
+            self._schedule(job, now, MANUAL_PRIORITY)
+
+    def pop_due(self, now: datetime) -> Optional[str]:
+        """Hands out the next due symbol, or None if nothing may run yet."""
+        if self.running is not None:
+            return None
+        if self.next_request_at is not None and now < self.next_request_at:
+            return None
+
+        # Among everything that is due, the highest priority (lowest number) runs first
+        due = []
+        while self._peek() is not None and self._queue[0][0] <= now:
+            due.append(heapq.heappop(self._queue))
+        if not due:
+            return None
+        chosen = min(due, key=lambda entry: (entry[1], entry[0], entry[2]))
+        for entry in due:
+            if entry is not chosen:
+                heapq.heappush(self._queue, entry)
+
+        job = self.jobs[chosen[3]]
+        job.next_run_at = None
+        self.running = job.symbol
+        self.next_request_at = now + self.request_spacing
+        self._request_log.append(now)
+        return job.symbol
+
+    def record_result(self, symbol: str, latest_date: Optional[date], now: datetime, error: Optional[str] = None):
+        """Records a finished refresh and schedules the symbol's next one."""
+        job = self.jobs[symbol]
+        if self.running == symbol:
+            self.running = None
+        job.last_run_at = now
+        job.last_error = error
+        if latest_date is not None and (job.latest_date is None or latest_date > job.latest_date):
+            job.latest_date = latest_date
+
+        if self._is_stale(job, now):
+            # Either the call failed or the session isn't published yet: back off
+            job.failures += 1
+            delay = min(RETRY_DELAY * 2 ** (job.failures - 1), MAX_RETRY_DELAY)
+            self._schedule(job, now + delay, self._staleness_priority(job, now))
+        else:
+            job.failures = 0
+            self._schedule(job, next_session_ready_at(now), 0)
+
+    def next_wakeup(self, now: datetime) -> Optional[datetime]:
+        """Returns when 'pop_due' may next hand out a job, or None if nothing is queued."""
+        head = self._peek()
+        if head is None:
+            return None
+        wake_at = head[0]
+        if self.next_request_at is not None and self.next_request_at > wake_at:
+            wake_at = self.next_request_at
+        return max(wake_at, now)
+
+    def session_complete(self, session: date) -> bool:
+        """Returns True once every symbol has data for the given trading day."""
+        return all(job.latest_date is not None and job.latest_date >= session for job in self.jobs.values())
+
+    def status(self, now: datetime) -> dict:
+        """Returns a JSON-friendly snapshot of the queue for the control surface."""
+        while self._request_log and self._request_log[0] <= now - self.quota_window:
+            self._request_log.popleft()
+
+        # Session times are New York time and the daemon's clock is UTC; report everything in UTC
+        def iso(moment: Optional[datetime]) -> Optional[str]:
+            return moment.astimezone(timezone.utc).isoformat() if moment else None
+
+        jobs = sorted(self.jobs.values(), key=lambda job: (job.next_run_at is None, job.next_run_at or now))
+        return {
+            "running": self.running,
+            "queue_depth": sum(1 for job in self.jobs.values() if job.next_run_at is not None and job.next_run_at <= now),
+            "scheduled": sum(1 for job in self.jobs.values() if job.next_run_at is not None),
+            "next_request_at": iso(self.next_request_at),
+            "requests_in_window": len(self._request_log),
+            "quota": self.quota,
+            "request_spacing_seconds": self.request_spacing.total_seconds(),
+            "last_session_date": last_session_date(now).isoformat(),
+            "jobs": [
+                {
+                    "symbol": job.symbol,
+                    "latest_date": job.latest_date.isoformat() if job.latest_date else None,
+                    "next_run_at": iso(job.next_run_at),
+                    "last_run_at": iso(job.last_run_at),
+                    "last_error": job.last_error,
+                    "failures": job.failures,
+                }
+                for job in jobs
+            ],
+        }
+
+    def _is_stale(self, job: SymbolJob, now: datetime) -> bool:
+        return job.latest_date is None or job.latest_date < last_session_date(now)
+
+    def _staleness_priority(self, job: SymbolJob, now: datetime) -> int:
+        # More days behind means a lower (earlier) priority; never-loaded symbols go first
+        if job.latest_date is None:
+            return MANUAL_PRIORITY + 1
+        return -(last_session_date(now) - job.latest_date).days
+
+    def _schedule(self, job: SymbolJob, due_at: datetime, priority: int):
+        job.next_run_at = due_at
+        job.version = next(self._versions)
+        heapq.heappush(self._queue, (due_at, priority, job.version, job.symbol))
+
+    def _peek(self):
+        # Drop entries superseded by a later reschedule of the same symbol
+        while self._queue and self._queue[0][2] != self.jobs[self._queue[0][3]].version:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
@@ -0,0 +1,113 @@
+import asyncio
+from pipeline import daemon
+from pipeline.scheduler import last_session_date
+
+
+def record(symbol: str, day) -> dict:
+    """A clean record for one symbol on one trading day."""
+    return {"symbol": symbol, "date": day.isoformat(), "open": 1.0, "high": 2.0, "low": 1.0, "close": 1.5, "volume": 10}
+
+
+def patch_daemon(tmp_path, monkeypatch, latest_dates):
+    """Replaces the daemon's database, API and PDF calls; returns the generated reports."""
+    reports = []
+    monkeypatch.setattr(daemon, "get_latest_dates", lambda: dict(latest_dates))
+    monkeypatch.setattr(daemon, "get_report_path", lambda report_date: str(tmp_path / f"daily_summary_{report_date}.pdf"))
+    monkeypatch.setattr(daemon, "get_recent_records", lambda symbols, days: [record(s, latest_dates[s]) for s in symbols])
+    monkeypatch.setattr(daemon, "generate_pdf_report", reports.append)
+
+    async def fake_run_pipeline(symbols, **kwargs):
+        latest_dates[symbols[0]] = last_session_date(daemon._now())
+        return [record(symbols[0], latest_dates[symbols[0]])]
+
+    monkeypatch.setattr(daemon, "run_pipeline", fake_run_pipeline)
+    return reports
+
+
+def test_restart_mid_session_still_generates_report(tmp_path, monkeypatch):
+    """
+    Tests that symbols loaded by an earlier run still count towards the session's report.
+    """
+    session = last_session_date(daemon._now())
+    reports = patch_daemon(tmp_path, monkeypatch, {"IBM": session})
+    pipeline_daemon = daemon.PipelineDaemon(client=None, symbols=["IBM", "AAPL"])
+
+    async def restart_and_refresh():
+        await pipeline_daemon.start()
+        assert reports == [] # AAPL is still missing
+        symbol = pipeline_daemon.scheduler.pop_due(daemon._now())
+        await pipeline_daemon._refresh(symbol)
+
+    asyncio.run(restart_and_refresh())
+
+    # One report, covering the symbol loaded before the restart too
+    assert len(reports) == 1
+    assert {r["symbol"] for r in reports[0]} == {"IBM", "AAPL"}
+
+
+def test_missing_report_is_caught_up_but_existing_one_is_kept(tmp_path, monkeypatch):
+    """
+    Tests that a complete session is reported on start-up unless its PDF already exists.
+    """
+    session = last_session_date(daemon._now())
+    reports = patch_daemon(tmp_path, monkeypatch, {"IBM": session, "AAPL": session})
+
+    asyncio.run(daemon.PipelineDaemon(client=None, symbols=["IBM", "AAPL"]).start())
+    assert len(reports) == 1
+
+    (tmp_path / f"daily_summary_{session.isoformat()}.pdf").write_bytes(b"%PDF")
+    asyncio.run(daemon.PipelineDaemon(client=None, symbols=["IBM", "AAPL"]).start())
+    assert len(reports) == 1
+
+
+
+def test_failed_load_keeps_symbol_stale(tmp_path, monkeypatch):
+    """
+    Tests that a refresh whose database write fails is retried and doesn't trigger the report.
+    """
+    session = last_session_date(daemon._now())
+    reports = patch_daemon(tmp_path, monkeypatch, {"IBM": session})
+
+    async def failing_run_pipeline(symbols, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(daemon, "run_pipeline", failing_run_pipeline)
+    pipeline_daemon = daemon.PipelineDaemon(client=None, symbols=["IBM", "AAPL"])
+
+    async def refresh_aapl():
+        await pipeline_daemon.start()
+        await pipeline_daemon._refresh(pipeline_daemon.scheduler.pop_due(daemon._now()))
+
+    asyncio.run(refresh_aapl())
+
+    job = pipeline_daemon.scheduler.jobs["AAPL"]
+    assert job.latest_date is None
+    assert job.failures == 1
+    assert "database is locked" in job.last_error
+    assert reports == []
+
+
+def test_failed_report_is_retried(tmp_path, monkeypatch):
+    """
+    Tests that a session whose PDF failed to render is not marked as reported.
+    """
+    session = last_session_date(daemon._now())
+    reports = patch_daemon(tmp_path, monkeypatch, {"IBM": session, "AAPL": session})
+    attempts = []
+
+    def flaky_generate_pdf_report(records):
+        attempts.append(records)
+        if len(attempts) == 1:
+            raise OSError("cannot load library 'libpango-1.0-0'")
+        reports.append(records)
+
+    monkeypatch.setattr(daemon, "generate_pdf_report", flaky_generate_pdf_report)
+    pipeline_daemon = daemon.PipelineDaemon(client=None, symbols=["IBM", "AAPL"])
+
+    async def start_then_retry():
+        await pipeline_daemon.start()
+        await pipeline_daemon._maybe_generate_report()
+
+    asyncio.run(start_then_retry())
+    assert len(attempts) == 2
+    assert len(reports) == 1
@@ -0,0 +1,78 @@
+import sqlite3
+from datetime import date
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from pipeline import loader
+
+
+def stock_record(symbol: str, day: str, close: float) -> dict:
+    """A clean record as produced by the transformer."""
+    return {"symbol": symbol, "date": day, "open": 100.0, "high": 105.0, "low": 95.0, "close": close, "volume": 1000}
+
+
+def test_overlapping_loads_only_insert_new_days(tmp_path, monkeypatch):
+    """
+    Tests that reloading overlapping records skips stored days and keeps the new ones.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(loader, "engine", engine)
+    loader.create_stock_data_table()
+
+    loader.load_data_to_db([
+        stock_record("IBM", "2024-01-01", 101.0),
+        stock_record("IBM", "2024-01-02", 102.0),
+        stock_record("AAPL", "2024-01-01", 50.0),
+    ])
+    # The second fetch overlaps the first by one day per symbol
+    loader.load_data_to_db([
+        stock_record("IBM", "2024-01-02", 999.0),
+        stock_record("IBM", "2024-01-03", 103.0),
+        stock_record("AAPL", "2024-01-01", 999.0),
+        stock_record("AAPL", "2024-01-02", 51.0),
+    ])
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT symbol, date, close FROM stock_data ORDER BY symbol, date")).all()
+
+    # Assert that each day is stored once and the duplicates didn't overwrite the originals
+    assert [tuple(row) for row in rows] == [
+        ("AAPL", "2024-01-01", 50.0),
+        ("AAPL", "2024-01-02", 51.0),
+        ("IBM", "2024-01-01", 101.0),
+        ("IBM", "2024-01-02", 102.0),
+        ("IBM", "2024-01-03", 103.0),
+    ]
+    assert loader.get_latest_dates() == {"IBM": date(2024, 1, 3), "AAPL": date(2024, 1, 2)}
+
+
+def test_table_creation_enables_wal(tmp_path, monkeypatch):
+    """
+    Tests that the database is switched to WAL so API reads don't block pipeline writes.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(loader, "engine", engine)
+    loader.create_stock_data_table()
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+def test_failed_write_is_raised(tmp_path, monkeypatch):
+    """
+    Tests that a write error isn't swallowed, so callers can't mistake unsaved data for loaded.
+    """
+    db_path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 0.1})
+    monkeypatch.setattr(loader, "engine", engine)
+    loader.create_stock_data_table()
+
+    # Another connection holds the write lock, so the load fails with 'database is locked'
+    blocker = sqlite3.connect(db_path)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        with pytest.raises(OperationalError, match="database is locked"):
+            loader.load_data_to_db([stock_record("IBM", "2024-01-01", 101.0)])
+    finally:
+        blocker.rollback()
+        blocker.close()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pipeline import lock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def test_leftover_lock_file_is_not_held(tmp_path):
+    """
+    Tests that a lock file nobody holds is taken while a held lock is refused.
+    """
+    lock_path = tmp_path / "pipeline.lock"
+    lock_path.write_text("") # e.g. left behind by a process that crashed
+
+    with lock.single_instance_lock(str(lock_path)):
+        # Assert that the lock now holds our PID and a second holder is refused
+        assert lock_path.read_text() == str(os.getpid())
+        try:
+            with lock.single_instance_lock(str(lock_path)):
+                raise AssertionError("A second lock holder was allowed in.")
+        except SystemExit as e:
+            assert str(os.getpid()) in str(e)
+
+    # Released on exit, so the next run can take it again
+    with lock.single_instance_lock(str(lock_path)):
+        pass
+
+
+def test_lock_is_released_when_its_owner_dies(tmp_path):
+    """
+    Tests that a killed owner's lock can be taken without any stale-lock cleanup.
+    """
+    lock_path = tmp_path / "pipeline.lock"
+    owner = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; from pipeline.lock import single_instance_lock\n"
+         "with single_instance_lock(sys.argv[1]):\n"
+         "    print('locked', flush=True); time.sleep(60)",
+         str(lock_path)],
+        stdout=subprocess.PIPE, text=True, cwd=PROJECT_ROOT,
+    )
+    try:
+        assert owner.stdout.readline().strip() == "locked"
+        try:
+            with lock.single_instance_lock(str(lock_path)):
+                raise AssertionError("The lock was taken while its owner was alive.")
+        except SystemExit:
+            pass
+    finally:
+        owner.kill()
+        owner.wait()
+
+    with lock.single_instance_lock(str(lock_path)):
+        assert lock_path.read_text() == str(os.getpid())
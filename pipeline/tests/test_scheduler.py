@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+from pipeline.scheduler import (
+    MARKET_TZ,
+    RefreshScheduler,
+    last_session_date,
+    next_session_ready_at,
+)
+
+# Wednesday 2024-01-10, 12:00 in New York (before the close)
+WEDNESDAY_NOON = datetime(2024, 1, 10, 12, 0, tzinfo=MARKET_TZ)
+
+
+def test_session_dates_follow_market_close():
+    """
+    Tests that a session only counts as published after the close, skipping weekends.
+    """
+    # Before Wednesday's close, the latest session is Tuesday's
+    assert last_session_date(WEDNESDAY_NOON) == date(2024, 1, 9)
+    assert next_session_ready_at(WEDNESDAY_NOON) == datetime(2024, 1, 10, 16, 30, tzinfo=MARKET_TZ)
+
+    # On Saturday the latest session is Friday's and the next one is Monday's
+    saturday = datetime(2024, 1, 13, 9, 0, tzinfo=MARKET_TZ)
+    assert last_session_date(saturday) == date(2024, 1, 12)
+    assert next_session_ready_at(saturday) == datetime(2024, 1, 15, 16, 30, tzinfo=MARKET_TZ)
+
+
+def test_stale_symbols_run_first_and_requests_are_paced():
+    """
+    Tests that the most stale symbols are refreshed first, one quota slot apart.
+    """
+    scheduler = RefreshScheduler(["IBM", "AAPL", "MSFT"], quota=24, quota_window=timedelta(days=1))
+    scheduler.seed({"IBM": date(2024, 1, 9), "AAPL": date(2024, 1, 5)}, WEDNESDAY_NOON)
+
+    # MSFT has never been loaded and AAPL is further behind than the up-to-date IBM
+    assert scheduler.status(WEDNESDAY_NOON)["queue_depth"] == 2
+    assert scheduler.pop_due(WEDNESDAY_NOON) == "MSFT"
+
+    # Nothing else is handed out while a job is running
+    assert scheduler.pop_due(WEDNESDAY_NOON) is None
+    scheduler.record_result("MSFT", date(2024, 1, 9), WEDNESDAY_NOON)
+
+    # The next call has to wait for the next quota slot (1 day / 24 = 1 hour)
+    assert scheduler.pop_due(WEDNESDAY_NOON) is None
+    assert scheduler.next_wakeup(WEDNESDAY_NOON) == WEDNESDAY_NOON + timedelta(hours=1)
+    assert scheduler.pop_due(WEDNESDAY_NOON + timedelta(hours=1)) == "AAPL"
+
+
+def test_fresh_symbols_wait_for_next_close_and_failures_back_off():
+    """
+    Tests that refreshed symbols are re-queued after the next close and failures are retried.
+    """
+    scheduler = RefreshScheduler(["IBM", "AAPL"], quota=24, quota_window=timedelta(days=1))
+    scheduler.seed({"IBM": date(2024, 1, 9)}, WEDNESDAY_NOON)
+    assert scheduler.pop_due(WEDNESDAY_NOON) == "AAPL"
+
+    # A failed refresh is retried after the backoff delay, not at the next close
+    scheduler.record_result("AAPL", None, WEDNESDAY_NOON, error="No data fetched or transformed.")
+    jobs = {job["symbol"]: job for job in scheduler.status(WEDNESDAY_NOON)["jobs"]}
+    assert jobs["AAPL"]["failures"] == 1
+    assert jobs["AAPL"]["next_run_at"] == "2024-01-10T17:30:00+00:00"
+    # Session times are reported in UTC like every other timestamp
+    assert jobs["IBM"]["next_run_at"] == "2024-01-10T21:30:00+00:00"
+
+    # A manual refresh jumps the queue
+    later = WEDNESDAY_NOON + timedelta(hours=1)
+    scheduler.request_refresh("IBM", later)
+    assert scheduler.pop_due(later) == "IBM"